@@ -25,15 +25,9 @@ from nomad.metainfo import (
 from nomad.datamodel.data import (
     Schema,
 )
-from nomad.datamodel.metainfo.annotations import (
-    ELNAnnotation,
-    ELNComponentEnum,
-)
 
 from nomad_forematics.schema_packages.substrate import (
-    ForOPVSubstrate,
     ForOPVSubstrateBatch,
-    ForOPVSubstrateCleaningReference,
 )
 
 from nomad_forematics.schema_packages.processing import (
@@ -41,7 +35,6 @@ from nomad_forematics.schema_packages.processing import (
 )
 
 from nomad_forematics.schema_packages.solution import (
-    ForOPVSolution,
     ForOPVSolutionReference,
 )
 from nomad_forematics.categories import (
@@ -50,6 +43,12 @@ from nomad_forematics.categories import (
 
 m_package = Package(name='Forematics OPV Experiment Schema')
 
+# Placeholder texts of the rich text fields, shared by all the experiments
+DEFAULT_OBJECTIVES = 'Describe the objectives of this OPV experiment...'
+DEFAULT_COMMENTS = 'General comments about this experiment...'
+DEFAULT_CONCLUSIONS = 'Add any conclusions about this experiment...'
+DEFAULT_MEASUREMENTS = 'To be defined.'
+
 class ForOPVExperiment(Schema):
     """
     Schema for an OPV experiment, combining substrate, solution, fabrication, and characterization.
@@ -65,21 +64,21 @@ class ForOPVExperiment(Schema):
         type=str,
         description='Describe the objective of this OPV experiment',
         a_eln={'component': 'RichTextEditQuantity'},
-        default='Describe the objectives of this OPV experiment...'
+        default=DEFAULT_OBJECTIVES
     )
 
     comments = Quantity(
         type=str,
         description='Any general comment about this experiment',
         a_eln={'component': 'RichTextEditQuantity'},
-        default='General comments about this experiment...'
+        default=DEFAULT_COMMENTS
     )
 
     conclusions = Quantity(
         type=str,
         description='Add any conclusions about this experiment',
         a_eln={'component': 'RichTextEditQuantity'},
-        default='Add any conclusions about this experiment...'
+        default=DEFAULT_CONCLUSIONS
     )
 
     # Reference to substrate batch entry
@@ -108,7 +107,7 @@ class ForOPVExperiment(Schema):
         type=str,
         description='Placeholder for measurements like JV curve, EQE, etc.',
         a_eln={'component': 'RichTextEditQuantity'},
-        default='To be defined.'
+        default=DEFAULT_MEASUREMENTS
     )
 
 m_package.__init_metainfo__()
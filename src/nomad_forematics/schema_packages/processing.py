@@ -16,48 +16,17 @@
 # limitations under the License.
 #
 from nomad.datamodel.data import EntryData
-from nomad.metainfo import MSection, Quantity, SubSection, Package, Section, MEnum, MProxy
+from nomad.metainfo import Quantity, Package, Section, MEnum, MProxy
 from nomad.datamodel.metainfo.basesections import Process, CompositeSystemReference
 from nomad.datamodel.metainfo.annotations import ELNAnnotation, ELNComponentEnum
 import numpy as np
 from nomad_forematics.categories import ForematicsCategory
-from nomad_forematics.schema_packages.substrate import ForOPVSubstrateBatch, ForOPVSubstrate, ForOPVSubstrateReference
+from nomad_forematics.schema_packages.substrate import ForOPVSubstrateBatch, ForOPVSubstrateReference
 
 m_package = Package(name='Forematics customised Substrate schema')
 
-# class ForOPVProcessingStep(Process, EntryData):
-#     '''
-#     Base class for OPV fabrication process steps.
-#     All specific processing types (blade coating, spin coating, annealing, etc.)
-#     should inherit from this class.
-#     '''
-
-#     m_def = MSection(label='OPV Processing Step')
-
-#     timestamp = Quantity(
-#         type=str,
-#         description='Date and time when the process step was performed.',
-#         a_eln=ELNAnnotation(component=ELNComponentEnum.DateTimeEdit),
-#     )
-
-#     duration = Quantity(
-#         type=float,
-#         unit='second',
-#         description='Duration of the process step.',
-#         a_eln=ELNAnnotation(component=ELNComponentEnum.NumberEdit),
-#     )
-
-#     atmosphere = Quantity(
-#         type=str,
-#         description='Atmosphere conditions (e.g., air, nitrogen glovebox).',
-#         a_eln=ELNAnnotation(component=ELNComponentEnum.TextEdit),
-#     )
-
-#     description = Quantity(
-#         type=str,
-#         description='Additional notes or observations about the process step.',
-#         a_eln=ELNAnnotation(component=ELNComponentEnum.RichTextEdit),
-#     )
+# Atmospheres shared by all the processing steps
+ATMOSPHERE_ENUM = MEnum(['Glovebox', 'Air', 'Others'])
 
 class ForOPVProcessingStepReference(CompositeSystemReference): #CompositeSystemReference
     '''
@@ -80,37 +49,40 @@ class ForOPVProcessingStepReference(CompositeSystemReference): #CompositeSystemR
         a_eln=ELNAnnotation(component=ELNComponentEnum.ReferenceEditQuantity)
     )
 
-
+    # (reference, resolved batch) of the last normalization pass
+    _resolved_batch = None
 
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        # Find any ProcessingStepReference instances in the archive
-        print('Entered normalizing funtion of ForOPVProcessingStepReference')
-
-        for section, a, b, c in archive.m_traverse():
-            print("Checking section: ", section, a, b, c)
-            if isinstance(section, ForOPVProcessingStepReference):
-                substrate_batch_ref = getattr(section, 'substrate_batch', None)
-                print("Reference found: ", substrate_batch_ref)
-                print("Type of ref:", type(substrate_batch_ref))
-
-                try:
-                    if isinstance(substrate_batch_ref, MProxy):
-                        batch = substrate_batch_ref.reference  # This triggers resolution
-                    else:
-                        batch = substrate_batch_ref  # Already resolved
-
-                    print("Reference resolved:", batch)
-                    print("Resolved batch type:", type(batch))
-                    print("Is instance of ForOPVSubstrateBatch:", isinstance(batch, ForOPVSubstrateBatch))
-
-                    if isinstance(batch, ForOPVSubstrateBatch):
-                        substrate_refs = batch.entities or []
-                        print("Entities: ", substrate_refs)
-                        section.samples = substrate_refs
-                        logger.info(f"Assigned {len(substrate_refs)} substrates from batch to processing step.")
-
-                except Exception as e:
-                    print("Could not resolve reference: ", e)
+        # Fill the samples from the substrate batch referenced by this step
+        substrate_batch_ref = self.m_get(_SUBSTRATE_BATCH_QUANTITY)
+        if substrate_batch_ref is None:
+            return
+
+        try:
+            # Reuse the batch resolved in a previous normalization pass, as long
+            # as the reference itself did not change
+            resolved_batch = self._resolved_batch
+            if resolved_batch is not None and resolved_batch[0] is substrate_batch_ref:
+                batch = resolved_batch[1]
+            else:
+                if isinstance(substrate_batch_ref, MProxy):
+                    batch = substrate_batch_ref.m_proxy_resolve()
+                else:
+                    batch = substrate_batch_ref  # Already resolved
+                self._resolved_batch = (substrate_batch_ref, batch)
+
+                logger.debug('Resolved substrate batch reference.', batch=batch)
+
+            if isinstance(batch, ForOPVSubstrateBatch):
+                substrate_refs = list(batch.entities or [])
+                self.m_set(_SAMPLES_QUANTITY, substrate_refs)
+                logger.info(
+                    'Assigned substrates from batch to processing step.',
+                    number_of_substrates=len(substrate_refs),
+                )
+
+        except Exception as e:
+            logger.warning('Could not resolve substrate batch reference.', exc_info=e)
 
 
 class ForOPVBladeCoating(Process, EntryData):
@@ -142,7 +114,7 @@ class ForOPVBladeCoating(Process, EntryData):
     )
 
     atmosphere = Quantity(
-        type=MEnum(['Glovebox', 'Air', 'Others']),
+        type=ATMOSPHERE_ENUM,
         description='The atmosphere during coating.',
         a_eln={'component': 'RadioEnumEditQuantity'}
     )
@@ -189,7 +161,7 @@ class ForOPVSpinCoating(Process, EntryData):
     )
 
     atmosphere = Quantity(
-        type=MEnum(['Glovebox', 'Air', 'Others']),
+        type=ATMOSPHERE_ENUM,
         description='The atmosphere during coating.',
         a_eln={'component': 'RadioEnumEditQuantity'}
     )
@@ -229,7 +201,7 @@ class ForOPVAnnealing(Process, EntryData):
     )
 
     atmosphere = Quantity(
-        type=MEnum(['Glovebox', 'Air', 'Others']),
+        type=ATMOSPHERE_ENUM,
         description='The atmosphere during coating.',
         a_eln={'component': 'RadioEnumEditQuantity'}
     )
@@ -240,12 +212,19 @@ class ForOPVAnnealing(Process, EntryData):
         a_eln={'component': 'RichTextEditQuantity'},
     )
 
-class ForOPVAnnealing(ForOPVProcessingStepReference):
+class ForOPVAnnealingReference(ForOPVProcessingStepReference):
     reference = Quantity(
-        type=ForOPVBladeCoating,
-        description='The reference to a ForOPVBladeCoating entity.',
+        type=ForOPVAnnealing,
+        description='The reference to a ForOPVAnnealing entity.',
         a_eln=ELNAnnotation(component=ELNComponentEnum.ReferenceEditQuantity),
     )
 
 
-m_package.__init_metainfo__()
\ No newline at end of file
+m_package.__init_metainfo__()
+
+# Quantity definitions used by every ForOPVProcessingStepReference normalization,
+# looked up once after the package is initialized
+_SUBSTRATE_BATCH_QUANTITY = ForOPVProcessingStepReference.m_def.all_quantities[
+    'substrate_batch'
+]
+_SAMPLES_QUANTITY = ForOPVProcessingStepReference.m_def.all_quantities['samples']
@@ -16,6 +16,9 @@
 # limitations under the License.
 #
 
+import math
+from collections.abc import Iterator
+from itertools import chain
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -32,7 +35,6 @@ from nomad.metainfo import (
     Section,
     SubSection,
 )
-from structlog.stdlib import BoundLogger
 
 from nomad_forematics.categories import ForematicsCategory
 
@@ -191,55 +193,66 @@ class ForOPVSolution(Schema):
             logger (BoundLogger): A structlog logger.
         """
         super().normalize(archive, logger)
-        if self.calculate_solution:
-            print_string = []
-            self._calculate_solvent_strings(print_string)
-            self._calculate_osc_strings(print_string)
-            self._calculate_additive_strings(print_string)
-
-            # Print the calculated parameters. The \n does not work for the kind of
-            # output data we have. Let's try to use <br /> as in HTML formatting
-            self.calculated_solution = '<br />'.join(print_string)
-            self.calculate_solution = False  # back to false
-
-    def _calculate_solvent_strings(self, print_string):
+        if not self.calculate_solution:
+            return
+
+        # Print the calculated parameters. The \n does not work for the kind of
+        # output data we have. Let's try to use <br /> as in HTML formatting
+        self.calculated_solution = '<br />'.join(
+            chain(
+                self._calculate_solvent_strings(),
+                self._calculate_osc_strings(),
+                self._calculate_additive_strings(),
+            )
+        )
+        self.calculate_solution = False  # back to false
+
+    def _calculate_solvent_strings(self) -> Iterator[str]:
         if not self.solvents:
-            print_string.append('No solvent components defined')
+            yield 'No solvent components defined'
         else:
+            # Convert the units once and compute each component with plain floats
+            total_volume_ml = self.total_volume.to('ml').magnitude
             total_solvent_ratio = sum(solvent.ratio for solvent in self.solvents)
             for solvent in self.solvents:
-                solvent_volume = self.total_volume * solvent.ratio / total_solvent_ratio
-                solvent_string = f"Solvent: {solvent.name} -> {solvent_volume.to('ml').magnitude:.6g} ml"
-                print_string.append(solvent_string)
+                solvent_volume = total_volume_ml * solvent.ratio / total_solvent_ratio
+                yield f"Solvent: {solvent.name} -> {solvent_volume:.6g} ml"
 
-    def _calculate_osc_strings(self, print_string):
-        total_osc_ratio = sum(donor.ratio for donor in self.donors) + sum(acceptor.ratio for acceptor in self.acceptors)
-        total_osc_mg = self.solute_concentration.to('mg/ml') * self.total_volume.to('ml')
+    def _calculate_osc_strings(self) -> Iterator[str]:
+        donors = list(self.donors)
+        acceptors = list(self.acceptors)
+        total_osc_ratio = math.fsum(osc.ratio for osc in chain(donors, acceptors))
+        total_osc_mg = (
+            self.solute_concentration.to('mg/ml').magnitude
+            * self.total_volume.to('ml').magnitude
+        )
+        # mg of organic semiconductor per unit of ratio
+        osc_mg_per_ratio = (
+            total_osc_mg / total_osc_ratio if total_osc_ratio else float('nan')
+        )
 
-        if not self.donors:
-            print_string.append('No donor components defined')
+        if not donors:
+            yield 'No donor components defined'
         else:
-            for donor in self.donors:
-                osc_mg = total_osc_mg * donor.ratio / total_osc_ratio
-                osc_string = f"Donor: {donor.name} -> {osc_mg.to('mg').magnitude:.6g} mg"
-                print_string.append(osc_string)
+            for donor in donors:
+                osc_mg = donor.ratio * osc_mg_per_ratio
+                yield f"Donor: {donor.name} -> {osc_mg:.6g} mg"
 
-        if not self.acceptors:
-            print_string.append('No acceptor components defined')
+        if not acceptors:
+            yield 'No acceptor components defined'
         else:
-            for acceptor in self.acceptors:
-                osc_mg = total_osc_mg * acceptor.ratio / total_osc_ratio
-                osc_string = f"Acceptor: {acceptor.name} -> {osc_mg.to('mg').magnitude:.6g} mg"
-                print_string.append(osc_string)
+            for acceptor in acceptors:
+                osc_mg = acceptor.ratio * osc_mg_per_ratio
+                yield f"Acceptor: {acceptor.name} -> {osc_mg:.6g} mg"
 
-    def _calculate_additive_strings(self, print_string):
+    def _calculate_additive_strings(self) -> Iterator[str]:
         if not self.additives:
-            print_string.append('No additives components defined')
+            yield 'No additives components defined'
         else:
+            total_volume_ul = self.total_volume.to('microlitre').magnitude
             for additive in self.additives:
-                additive_volume = additive.liquid_percent / 100 * self.total_volume.to('microlitre')
-                additive_string = f"Additive: {additive.name} -> {additive_volume.to('microlitre').magnitude:.6g} ul"
-                print_string.append(additive_string)
+                additive_volume = additive.liquid_percent / 100 * total_volume_ul
+                yield f"Additive: {additive.name} -> {additive_volume:.6g} ul"
 
 class ForOPVSolutionReference(CompositeSystemReference):
     reference = Quantity(
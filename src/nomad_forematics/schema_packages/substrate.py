@@ -16,6 +16,7 @@
 # limitations under the License.
 #
 
+from functools import cache
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -39,8 +40,6 @@ from nomad.metainfo import (
 from nomad_material_processing.general import (
     Substrate,
 )
-from nomad_material_processing.utils import create_archive
-from structlog.stdlib import BoundLogger
 
 from nomad_forematics.categories import ForematicsCategory
 
@@ -51,6 +50,18 @@ if TYPE_CHECKING:
 m_package = Package(name='Forematics customised Substrate schema')
 
 
+@cache
+def _qualified_name(section_cls: type[Schema]) -> str:
+    return section_cls.m_def.qualified_name()
+
+
+# Width, length and depth (in meters) of the pre-defined substrate sizes
+SUBSTRATE_SIZE_DIMENSIONS = {
+    'Scale-up': (0.025, 0.075, 0.0011),
+    'Spin-coating': (0.010, 0.020, 0.0011),
+}
+
+
 class ForOPVSubstrate(Substrate, Schema):
     """
     Schema for one solar cell substrate in the Forematics lab.
@@ -120,14 +131,9 @@ class ForOPVSubstrate(Substrate, Schema):
         super().normalize(archive, logger)
 
         # Define the sizes of the possible pre-defined substrates
-        if self.size == 'Scale-up':
-            self.width = 7#0.025
-            self.length = 7#0.075
-            self.depth = 7#0.0011
-        elif self.size == 'Spin-coating':
-            self.width = 3#0.010
-            self.length = 3#0.020
-            self.depth = 3#0.0011
+        dimensions = SUBSTRATE_SIZE_DIMENSIONS.get(self.size)
+        if dimensions is not None:
+            self.width, self.length, self.depth = dimensions
 
 class ForOPVSubstrateReference(CompositeSystemReference):
     reference = Quantity(
@@ -190,36 +196,76 @@ class ForOPVSubstrateBatch(Collection, Schema):
         a_eln={'component': 'StringEditQuantity'}
     )
 
+    # (substrate, entry id) pairs of the resolved entities, see `_substrates`
+    _resolved_substrates = None
+
+    def _substrates(self) -> list[tuple[ForOPVSubstrate, str]]:
+        """
+        Resolves the substrate references of the batch once and returns each
+        substrate together with the id of its entry.
+        """
+        if self._resolved_substrates is None:
+            resolved_substrates = []
+            ref: ForOPVSubstrateReference
+            for ref in self.entities:
+                if isinstance(ref.reference, MProxy):
+                    ref.reference.m_proxy_resolve()
+                if isinstance(ref.reference, ForOPVSubstrate):
+                    substrate = ref.reference
+                    resolved_substrates.append((substrate, substrate.m_parent.entry_id))
+            self._resolved_substrates = resolved_substrates
+
+        return self._resolved_substrates
+
     def next_used_in(
         self, entry_type: type[Schema], negate: bool = False
     ) -> ForOPVSubstrate:
+        if not self.entities:
+            return None
+        substrates = self._substrates()
+        if not substrates:
+            return None
+
         from nomad.search import (
             MetadataPagination,
+            MetadataRequired,
             search,
         )
 
-        ref: ForOPVSubstrateReference
-        for ref in self.entities:
-            if isinstance(ref.reference, MProxy):
-                ref.reference.m_proxy_resolve()
-            if not isinstance(ref.reference, ForOPVSubstrate):
-                continue
-            substrate = ref.reference
-            query = {
-                'section_defs.definition_qualified_name:all': [
-                    entry_type.m_def.qualified_name()
-                ],
-                'entry_references.target_entry_id:all': [substrate.m_parent.entry_id],
-            }
+        # Collect the substrates referenced by any entry of `entry_type` with a
+        # single search, instead of searching once per substrate
+        qualified_name = _qualified_name(entry_type)
+        entry_ids = {entry_id for _, entry_id in substrates}
+        query = {
+            'section_defs.definition_qualified_name:all': [qualified_name],
+            'entry_references.target_entry_id:any': sorted(entry_ids),
+        }
+        required = MetadataRequired(include=['entry_references'])
+        user_id = self.m_parent.metadata.main_author.user_id
+        used_entry_ids = set()
+        pagination = MetadataPagination(page_size=len(entry_ids))
+        while True:
             search_result = search(
                 owner='all',
                 query=query,
-                pagination=MetadataPagination(page_size=1),
-                user_id=self.m_parent.metadata.main_author.user_id,
+                pagination=pagination,
+                required=required,
+                user_id=user_id,
             )
-            if search_result.pagination.total > 0 and not negate:
-                return substrate
-            elif search_result.pagination.total == 0 and negate:
+            for entry in search_result.data:
+                used_entry_ids.update(
+                    reference.get('target_entry_id')
+                    for reference in entry.get('entry_references', [])
+                )
+            next_page_after_value = search_result.pagination.next_page_after_value
+            if next_page_after_value is None or entry_ids <= used_entry_ids:
+                break
+            pagination = MetadataPagination(
+                page_size=len(entry_ids), page_after_value=next_page_after_value
+            )
+
+        for substrate, entry_id in substrates:
+            if (entry_id in used_entry_ids) != negate:
                 return substrate
         return None
 
@@ -237,25 +283,30 @@ class ForOPVSubstrateBatch(Collection, Schema):
         """
         super().normalize(archive, logger)
         if self.create_substrates:
+            from nomad_material_processing.utils import create_archive
 
-            self.entities = []
+            self._resolved_substrates = None
 
-            substrate = ForOPVSubstrate()
+            template = ForOPVSubstrate()
 
-            substrate.supplier = self.supplier
-            substrate.size = self.size
-            substrate.normalize(archive, logger)
+            template.supplier = self.supplier
+            template.size = self.size
+            template.normalize(archive, logger)
+            template.datetime = self.datetime
 
+            name_prefix = f'{self.name} '
+            lab_id_prefix = f'{self.lab_id}-'
+            entities = []
             for i in range(self.number_of_substrates):
-                substrate.name = f'{self.name} {i}' #Definition of substrates names
-                substrate.datetime = self.datetime
-                substrate.lab_id = f'{self.lab_id}-{i}'
+                substrate = template.m_copy(deep=True)
+                substrate.name = name_prefix + str(i) #Definition of substrates names
+                substrate.lab_id = lab_id_prefix + str(i)
                 file_name = f'{substrate.name}.archive.json'
                 substrate_archive = create_archive(substrate, archive, file_name)
 
                 # Check if that is correct aftwerwards with
                 # the implementation in oasis environment
-                self.entities.append(
+                entities.append(
                     # CompositeSystemReference(
                     ForOPVSubstrateReference(
                         reference=substrate_archive,
@@ -263,6 +314,7 @@ class ForOPVSubstrateBatch(Collection, Schema):
                         lab_id=substrate.lab_id,
                     )
                 )
+            self.entities = entities
             self.create_substrates = False
 
 class ForOPVSubstrateBatchReference(CompositeSystemReference):
@@ -292,6 +344,14 @@ class CleaningStep(ProcessStep):
         unit='second',
     )
 
+# Cleaning agents and sonication times (in seconds) of the 'Standard' procedure
+STANDARD_CLEANING_PROTOCOL = (
+    ('Acetone', 60 * 5),
+    ('Hellmanex', 60 * 5),
+    ('IPA', 60 * 5),
+    ('NaOH', 60 * 10),
+)
+
 class ForOPVSubstrateCleaning(Process, Schema):
     """
     Schema for substrate cleaning at the Forematics lab for OPV samples.
@@ -319,6 +379,23 @@ class ForOPVSubstrateCleaning(Process, Schema):
         section_def=CleaningStep,
         repeats=True
     )
+
+    def _has_standard_steps(self) -> bool:
+        """
+        Whether the steps are already the ones of the 'Standard' procedure.
+        """
+        if len(self.steps) != len(STANDARD_CLEANING_PROTOCOL):
+            return False
+        for step, (agent, time) in zip(self.steps, STANDARD_CLEANING_PROTOCOL):
+            if (
+                step.cleaning_agent != agent
+                or not step.sonication
+                or step.cleaning_time is None
+                or step.cleaning_time.to('second').magnitude != time
+            ):
+                return False
+        return True
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
         The normalizer for the `ForOPVSubstrateCleaning` class.
@@ -328,22 +405,15 @@ class ForOPVSubstrateCleaning(Process, Schema):
             normalized.
             logger (BoundLogger): A structlog logger.
         """
-        super().normalize(archive, logger)
         # self.samples = self.substrate_batch.entities
-        if self.procedure == 'Standard':
-            self.steps = [] # reset the steps to avoid overwritting
-            protocol = [['Acetone', 60*5],
-                        ['Hellmanex',60*5],
-                        ['IPA',60*5],
-                        ['NaOH',60*10]]
-
-            for agent, time in protocol:
-                cstep = CleaningStep()
-                cstep.sonication = True
-                cstep.cleaning_agent = agent
-                cstep.cleaning_time = time
-                self.steps.append(cstep)
-        return super().normalize(archive, logger)
+        if self.procedure == 'Standard' and not self._has_standard_steps():
+            # replace any previous steps with the standard protocol
+            self.steps = [
+                CleaningStep(cleaning_agent=agent, cleaning_time=time, sonication=True)
+                for agent, time in STANDARD_CLEANING_PROTOCOL
+            ]
+        # Normalize once, after the steps are set, so the new steps are included
+        super().normalize(archive, logger)
 
 class ForOPVSubstrateCleaningReference(CompositeSystemReference):
     reference = Quantity(
@@ -352,4 +422,4 @@ class ForOPVSubstrateCleaningReference(CompositeSystemReference):
         a_eln=ELNAnnotation(component=ELNComponentEnum.ReferenceEditQuantity),
     )
 
-m_package.__init_metainfo__()
\ No newline at end of file
+m_package.__init_metainfo__()
@@ -1,6 +1,18 @@
 import os.path
+from importlib import import_module
+from types import SimpleNamespace
 
+import pytest
 from nomad.client import normalize_all, parse
+from nomad.datamodel import EntryArchive, EntryMetadata, User
+
+from nomad_forematics import schema_packages
+from nomad_forematics.schema_packages.substrate import (
+    ForOPVSubstrate,
+    ForOPVSubstrateBatch,
+    ForOPVSubstrateCleaning,
+    ForOPVSubstrateReference,
+)
 
 
 def test_schema_package():
@@ -9,3 +21,167 @@ def test_schema_package():
     normalize_all(entry_archive)
 
     assert entry_archive.data.message == 'Hello Markus!'
+
+
+@pytest.mark.parametrize(
+    'entry_point_name', ['substrate', 'solution', 'experiment', 'processing']
+)
+def test_entry_point_round_trip(entry_point_name):
+    entry_point = getattr(schema_packages, entry_point_name)
+    # the plugin loader rebuilds the entry points from their dumped config
+    rebuilt = entry_point.__class__.model_validate(entry_point.model_dump())
+
+    m_package = import_module(
+        f'nomad_forematics.schema_packages.{entry_point_name}'
+    ).m_package
+    assert rebuilt.load() is m_package
+
+
+def test_solution_calculation():
+    test_file = os.path.join('tests', 'data', 'solution.archive.yaml')
+    entry_archive = parse(test_file)[0]
+    normalize_all(entry_archive)
+
+    assert entry_archive.data.calculated_solution == '<br />'.join(
+        [
+            'Solvent: CB -> 0.6 ml',
+            'Donor: PM6 -> 2 mg',
+            'Acceptor: Y6 -> 2 mg',
+            'Acceptor: COTIC-4F -> 8 mg',
+            'Additive: DIO -> 3 ul',
+        ]
+    )
+    assert entry_archive.data.calculate_solution is False
+
+
+def _assert_standard_cleaning_steps(steps):
+    assert [
+        (
+            step.cleaning_agent,
+            step.cleaning_time.to('second').magnitude,
+            step.sonication,
+        )
+        for step in steps
+    ] == [
+        ('Acetone', 300, True),
+        ('Hellmanex', 300, True),
+        ('IPA', 300, True),
+        ('NaOH', 600, True),
+    ]
+
+
+def test_standard_cleaning_creates_steps():
+    test_file = os.path.join('tests', 'data', 'cleaning_standard.archive.yaml')
+    entry_archive = parse(test_file)[0]
+    normalize_all(entry_archive)
+
+    _assert_standard_cleaning_steps(entry_archive.data.steps)
+
+
+def test_standard_cleaning_keeps_standard_steps():
+    test_file = os.path.join('tests', 'data', 'cleaning_standard_steps.archive.yaml')
+    entry_archive = parse(test_file)[0]
+    normalize_all(entry_archive)
+
+    _assert_standard_cleaning_steps(entry_archive.data.steps)
+    # the existing steps are kept, so their comments are not lost
+    assert [step.comment for step in entry_archive.data.steps] == [
+        'Standard step'
+    ] * 4
+
+
+def test_standard_cleaning_rebuilds_modified_steps():
+    test_file = os.path.join('tests', 'data', 'cleaning_modified_steps.archive.yaml')
+    entry_archive = parse(test_file)[0]
+    normalize_all(entry_archive)
+
+    _assert_standard_cleaning_steps(entry_archive.data.steps)
+    # the steps are rebuilt from the protocol, which drops the comments
+    assert [step.comment for step in entry_archive.data.steps] == [None] * 4
+
+
+@pytest.mark.parametrize(
+    'size, width, length, depth',
+    [
+        ('Scale-up', 0.025, 0.075, 0.0011),
+        ('Spin-coating', 0.010, 0.020, 0.0011),
+    ],
+)
+def test_substrate_size_dimensions(size, width, length, depth):
+    entry_archive = EntryArchive(
+        metadata=EntryMetadata(), data=ForOPVSubstrate(size=size)
+    )
+    normalize_all(entry_archive)
+
+    substrate = entry_archive.data
+    assert substrate.width.to('m').magnitude == pytest.approx(width)
+    assert substrate.length.to('m').magnitude == pytest.approx(length)
+    assert substrate.depth.to('m').magnitude == pytest.approx(depth)
+
+
+def _substrate_batch(entry_ids):
+    entities = []
+    for entry_id in entry_ids:
+        substrate = ForOPVSubstrate(name=entry_id)
+        EntryArchive(entry_id=entry_id, data=substrate)
+        entities.append(ForOPVSubstrateReference(reference=substrate))
+    batch = ForOPVSubstrateBatch(entities=entities)
+    EntryArchive(
+        metadata=EntryMetadata(main_author=User(user_id='user')), data=batch
+    )
+    return batch
+
+
+def _mock_search(monkeypatch, pages):
+    """
+    Replaces `nomad.search.search` with one that returns the entry references of
+    the given pages one after the other and records the pagination of each call.
+    """
+    calls = []
+
+    def search(pagination, **kwargs):
+        calls.append(pagination)
+        target_entry_ids, next_page_after_value = pages[len(calls) - 1]
+        return SimpleNamespace(
+            data=[
+                {'entry_references': [{'target_entry_id': entry_id}]}
+                for entry_id in target_entry_ids
+            ],
+            pagination=SimpleNamespace(next_page_after_value=next_page_after_value),
+        )
+
+    monkeypatch.setattr('nomad.search.search', search)
+    return calls
+
+
+def test_next_used_in_reads_all_pages(monkeypatch):
+    batch = _substrate_batch(['s0', 's1', 's2'])
+    calls = _mock_search(monkeypatch, [(['other'], '1'), (['s1'], None)])
+
+    assert batch.next_used_in(ForOPVSubstrateCleaning).name == 's1'
+    assert [call.page_after_value for call in calls] == [None, '1']
+
+
+def test_next_not_used_in(monkeypatch):
+    batch = _substrate_batch(['s0', 's1', 's2'])
+    _mock_search(monkeypatch, [(['s0'], '1'), (['s2'], None)])
+
+    assert batch.next_not_used_in(ForOPVSubstrateCleaning).name == 's1'
+
+
+def test_next_used_in_without_used_substrates(monkeypatch):
+    batch = _substrate_batch(['s0', 's1'])
+    # one search per call, as nothing is cached between them
+    _mock_search(monkeypatch, [([], None), ([], None)])
+
+    assert batch.next_used_in(ForOPVSubstrateCleaning) is None
+    assert batch.next_not_used_in(ForOPVSubstrateCleaning).name == 's0'
+
+
+def test_next_used_in_stops_when_all_substrates_are_used(monkeypatch):
+    batch = _substrate_batch(['s0', 's1'])
+    calls = _mock_search(monkeypatch, [(['s1', 's0'], '1'), (['other'], None)])
+
+    assert batch.next_not_used_in(ForOPVSubstrateCleaning) is None
+    # every substrate is already used after the first page
+    assert len(calls) == 1